@@ -1,66 +1,94 @@
+import functools
 import json
+import logging
 import os
 import pathlib
 import requests
 import random
+import re
 import pycountry
 import smtplib
+import sys
+import threading
+import time
 import pytz
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
+from types import SimpleNamespace
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from openai import OpenAI
 
-def obtain_weather_data(config, location=None):
-    """Fetch weather data from OpenWeatherMap API."""   
-    # Accessing weather configuration
-    weather_config = config.get('api', {}).get('weather')
+logger = logging.getLogger(__name__)
 
-    if weather_config is None:
-        raise ValueError("Weather configuration not found in configuration.json")
-    
-    # Get API key and endpoint
-    api_key = weather_config.get('apiKey')
-    weather_endpoint = weather_config.get('weatherEndpoint')
-    geo_endpoint = weather_config.get('geoEndpoint')
+# orjson is optional; json.loads accepts the same bytes input as a fallback
+try:
+    import orjson
+    _loads = orjson.loads
+
+    def _dumps(obj, indent=False):
+        """Serialize obj to a JSON string, optionally indented by two spaces."""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode()
+except ImportError:
+    orjson = None
+    _loads = json.loads
+
+    def _dumps(obj, indent=False):
+        """Serialize obj to a JSON string, optionally indented by two spaces."""
+        return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False)
+
+# Shared HTTP session so the weather endpoints reuse keep-alive connections
+_HTTP = requests.Session()
+_HTTP.mount('https://', HTTPAdapter(pool_connections=32, pool_maxsize=32,
+                                    max_retries=Retry(total=2, backoff_factor=0.2)))
+_HTTP_TIMEOUT = (3, 10)  # connect, read (seconds)
+
+# Weather responses are reused for this long, since OpenWeatherMap updates roughly every 10 minutes
+_WEATHER_CACHE_TTL = 600  # seconds
+_weather_cache = {}
+_weather_cache_lock = threading.Lock()
+
+def _get_json(url, ttl=0):
+    """GET a URL with the shared session and parse the JSON body, reusing responses younger than ttl seconds."""
+    now = time.monotonic()
+    if ttl:
+        with _weather_cache_lock:
+            cached = _weather_cache.get(url)
+            if cached is not None and now - cached[0] < ttl:
+                return cached[1]
     
-    # Get location from parameters or fall back to default location
-    if location is None:
-        location = config.get('preferences', {}).get('defaultLocation', {})
+    response = _HTTP.get(url, timeout=_HTTP_TIMEOUT)
+    response.raise_for_status()
+    data = _loads(response.content)
     
-    city = location.get('city')
-    country = location.get('country')
-
-    if not city or not country:
-        raise ValueError("Location information is missing or incomplete")
+    if ttl:
+        with _weather_cache_lock:
+            # Drop expired entries before storing the new response
+            for key in [key for key, (created, _) in _weather_cache.items() if now - created >= ttl]:
+                del _weather_cache[key]
+            _weather_cache[url] = (now, data)
+    return data
 
+@functools.lru_cache(maxsize=256)
+def _geocode(api_key, geo_endpoint, city, country):
+    """Resolve a city and country to coordinates and the canonical city name via the geocoding API."""
     # Construct the URL for geocoding
     geo_url = f"{geo_endpoint}q={city},{country}&limit=1&appid={api_key}"
 
     # Make requests to obtain the coordinates
-    response = requests.get(geo_url)
-    response.raise_for_status()
-    geo_data = response.json()
+    geo_data = _get_json(geo_url)
         
     if not geo_data:
         raise ValueError(f"No location found for {city}, {country}")
             
-    # Extract coordinates from the first result
-    lat = geo_data[0]['lat']
-    lon = geo_data[0]['lon']
+    # Extract coordinates and name from the first result
+    return geo_data[0]['lat'], geo_data[0]['lon'], geo_data[0].get('name')
 
-    # Construct the URL for weather data
-    weather_url = f"{weather_endpoint}lat={lat}&lon={lon}&appid={api_key}&units=metric"
-    
-    # Make request to obtain weather data
-    response = requests.get(weather_url)
-    response.raise_for_status()
-    weather_data = response.json()
-    print(f"Raw Weather Data for {city}, {country}: \n", weather_data)
-    return weather_data
-
-def obtain_forecast_data(config, location=None):
-    """Fetch weather forecast data from OpenWeatherMap One Call API 3.0."""
+def obtain_onecall_data(config, location=None):
+    """Fetch current weather and forecast data from OpenWeatherMap One Call API 3.0 in one request."""
     # Accessing weather configuration
     weather_config = config.get('api', {}).get('weather')
 
@@ -82,58 +110,48 @@ def obtain_forecast_data(config, location=None):
     if not city or not country:
         raise ValueError("Location information is missing or incomplete")
 
-    # Construct the URL for geocoding
-    geo_url = f"{geo_endpoint}q={city},{country}&limit=1&appid={api_key}"
-
-    # Make requests to obtain the coordinates
-    response = requests.get(geo_url)
-    response.raise_for_status()
-    geo_data = response.json()
-        
-    if not geo_data:
-        raise ValueError(f"No location found for {city}, {country}")
-            
-    # Extract coordinates from the first result
-    lat = geo_data[0]['lat']
-    lon = geo_data[0]['lon']
+    # Obtain the coordinates and canonical city name (cached per city and country)
+    lat, lon, name = _geocode(api_key, geo_endpoint, city, country)
 
     # Construct the URL for one call API
     # Include current weather, hourly forecast, and daily forecast
     # Exclude minutely alerts to reduce data size
     onecall_url = f"{onecall_endpoint}lat={lat}&lon={lon}&appid={api_key}&units=metric&exclude=minutely,alerts"
     
-    # Make request to obtain forecast data
-    response = requests.get(onecall_url)
-    response.raise_for_status()
-    forecast_data = response.json()
-    print(f"Raw Forecast Data for {city}, {country}: \n", forecast_data)
-    return forecast_data
-
-def handle_weather_data(weather_data):
-    """Process weather data and extract relevant information."""
-    if not weather_data or 'main' not in weather_data:
-        print("Weather data not available")
+    # Make request to obtain weather and forecast data
+    onecall_data = _get_json(onecall_url, ttl=_WEATHER_CACHE_TTL)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Raw One Call Data for %s, %s: \n%s", city, country, onecall_data)
+    
+    # One Call data has no place name; add the geocoded one without touching the cached response
+    return {**onecall_data, 'name': name}
+
+def handle_weather_data(onecall_data, location):
+    """Extract the current weather summary from One Call API data."""
+    current = onecall_data.get('current') if onecall_data else None
+    if not current:
+        logger.warning("Weather data not available")
         return None
     
-    # Location information
-    location = weather_data.get('name', 'Unknown location')
-    country = weather_data.get('sys', {}).get('country', '')
+    # Today's temperature range comes from the daily forecast
+    daily = onecall_data.get('daily', [])
+    today_temp = daily[0].get('temp', {}) if daily else {}
     
     # Weather information
-    current_temperature = weather_data['main']['temp']
-    temp_min = weather_data['main']['temp_min']
-    temp_max = weather_data['main']['temp_max']
-    feels_like = weather_data['main']['feels_like']
-    weather_type = weather_data.get('weather', [{}])[0].get('main', 'unknown')
-    weather_description = weather_data.get('weather', [{}])[0].get('description', 'unknown')
-    humidity = weather_data['main']['humidity']
-    pressure = weather_data['main']['pressure']
-    wind_speed = weather_data.get('wind', {}).get('speed','Unknown')
-    wind_direction = weather_data.get('wind', {}).get('deg', 'Unknown')
-    visibility = weather_data.get('visibility', 'Unknown') / 1000
-    dt_timestamp = weather_data.get('dt')
-    sunrise_timestamp = weather_data.get('sys', {}).get('sunrise')
-    sunset_timestamp = weather_data.get('sys', {}).get('sunset')
+    current_temperature = current.get('temp', 'Unknown')
+    temp_min = today_temp.get('min', 'Unknown')
+    temp_max = today_temp.get('max', 'Unknown')
+    feels_like = current.get('feels_like', 'Unknown')
+    weather_type = current.get('weather', [{}])[0].get('main', 'unknown')
+    weather_description = current.get('weather', [{}])[0].get('description', 'unknown')
+    humidity = current.get('humidity', 'Unknown')
+    pressure = current.get('pressure', 'Unknown')
+    wind_speed = current.get('wind_speed', 'Unknown')
+    wind_direction = current.get('wind_deg', 'Unknown')
+    visibility = current['visibility'] / 1000 if 'visibility' in current else 'Unknown'
+    dt_timestamp = current.get('dt')
+    sunrise_timestamp = current.get('sunrise')
+    sunset_timestamp = current.get('sunset')
 
     # Convert timestamps to human-readable format
     current_time = datetime.fromtimestamp(dt_timestamp).strftime('%Y-%m-%d %H:%M:%S') if dt_timestamp else 'Unknown'
@@ -142,7 +160,7 @@ def handle_weather_data(weather_data):
     
     # Format the weather information
     weather_info = {
-        'location': f"{location}",
+        'location': onecall_data.get('name') or location.get('city', 'Unknown location'),
         'temperature': f"{current_temperature}°C (feels like {feels_like}°C)",
         'temperature_range': f"Min: {temp_min}°C, Max: {temp_max}°C",
         'weather_type': f"{weather_type.capitalize()}: {weather_description}",
@@ -154,13 +172,30 @@ def handle_weather_data(weather_data):
         'visibility': f"{visibility} km"
     }
     
-    print("Processed Weather Data: \n", weather_info)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Processed Weather Data: \n%s", weather_info)
     return weather_info
 
+def process_onecall_data(onecall_data, location):
+    """Split One Call API data into the combined current weather and forecast information."""
+    weather_info = handle_weather_data(onecall_data, location)
+    forecast_info = process_forecast_data(onecall_data)
+    return {**weather_info, **forecast_info}
+
+# Forecast time slots shown in the email, keyed by hour of day
+_FORECAST_SLOTS = {
+    6: 'morning_6', 8: 'morning_8', 10: 'morning_10',
+    12: 'afternoon_12', 14: 'afternoon_14', 16: 'afternoon_16',
+    18: 'evening_18', 20: 'evening_20', 22: 'evening_22'
+}
+
+# Slot name for each hour of the day (None when the hour is not shown), indexed by hour
+_SLOT_BY_HOUR = tuple(_FORECAST_SLOTS.get(hour) for hour in range(24))
+
 def process_forecast_data(forecast_data):
     """Process forecast data from the One Call API and extract relevant information."""
     if not forecast_data:
-        print("Forecast data not available")
+        logger.warning("Forecast data not available")
         return {}
     
     # Extract current weather data
@@ -189,11 +224,6 @@ def process_forecast_data(forecast_data):
     
     # Process hourly forecast data for specific times
     hourly_forecasts = {}
-    time_slots = {
-        'morning_6': 6, 'morning_8': 8, 'morning_10': 10,
-        'afternoon_12': 12, 'afternoon_14': 14, 'afternoon_16': 16,
-        'evening_18': 18, 'evening_20': 20, 'evening_22': 22
-    }
     
     # Find min and max temperature from daily data
     temp_min = 100  # Start with a high value
@@ -207,39 +237,33 @@ def process_forecast_data(forecast_data):
     # Find the highest precipitation probability and its time
     max_precip = 0
     max_precip_time = "None"
-    max_precip_hour = None
     
-    # Process hourly data
-    for hour in hourly:
-        dt = hour.get('dt', 0)
-        hour_datetime = datetime.fromtimestamp(dt)
-        hour_of_day = hour_datetime.hour
+    # Count weather types over the first 24 hours to find the day's main type
+    weather_counts = Counter()
+    
+    # Process hourly data in a single pass
+    for i, hour in enumerate(hourly):
+        hour_datetime = datetime.fromtimestamp(hour.get('dt', 0))
+        pop = hour.get('pop', 0) * 100  # Convert to percentage
+        hour_weather = hour.get('weather', [{}])[0].get('main', 'Unknown')
         
         # Store hourly forecast for specific times
-        for slot_name, slot_hour in time_slots.items():
-            if hour_of_day == slot_hour:
-                hour_temp = hour.get('temp', 'Unknown')
-                hour_pop = hour.get('pop', 0) * 100  # Convert to percentage
-                hour_weather = hour.get('weather', [{}])[0].get('main', 'Unknown')
-                
-                hourly_forecasts[f"{slot_name}_temp"] = f"{hour_temp}°C"
-                hourly_forecasts[f"{slot_name}_precip"] = f"{hour_pop:.0f}%"
-                hourly_forecasts[f"{slot_name}_weather"] = hour_weather
+        slot_name = _SLOT_BY_HOUR[hour_datetime.hour]
+        if slot_name is not None:
+            hourly_forecasts[f"{slot_name}_temp"] = f"{hour.get('temp', 'Unknown')}°C"
+            hourly_forecasts[f"{slot_name}_precip"] = f"{pop:.0f}%"
+            hourly_forecasts[f"{slot_name}_weather"] = hour_weather
         
         # Check for max precipitation probability
-        pop = hour.get('pop', 0) * 100  # Convert to percentage
         if pop > max_precip:
             max_precip = pop
-            max_precip_hour = hour_datetime
             max_precip_time = hour_datetime.strftime('%H:%M')
+        
+        if i < 24:
+            weather_counts[hour_weather] += 1
     
     # Determine main weather type for the day
-    weather_counts = {}
-    for hour in hourly[:24]:  # Consider only first 24 hours
-        w_type = hour.get('weather', [{}])[0].get('main', 'Unknown')
-        weather_counts[w_type] = weather_counts.get(w_type, 0) + 1
-    
-    weather_main_type = max(weather_counts.items(), key=lambda x: x[1])[0] if weather_counts else 'Unknown'
+    weather_main_type = weather_counts.most_common(1)[0][0] if weather_counts else 'Unknown'
     
     # Format all the forecast information
     forecast_info = {
@@ -263,9 +287,118 @@ def process_forecast_data(forecast_data):
     # Add hourly forecasts to the forecast info
     forecast_info.update(hourly_forecasts)
     
-    print("Processed Forecast Data: \n", forecast_info)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Processed Forecast Data: \n%s", forecast_info)
     return forecast_info
 
+# Activity suggestion tables, indexed by language and then weather bucket
+_ACTIVITY_SUGGESTIONS = {
+    'zh': {
+        'clear': (
+            "<li>晴朗的天气非常适合户外活动，如远足、野餐或公园漫步。</li>",
+            "<li>在阳光下活动时，请记得涂抹防晒霜并多喝水。</li>",
+            "<li>今天是拍摄户外照片的绝佳时机！</li>"
+        ),
+        'cloud': (
+            "<li>多云天气适合轻度户外活动，如散步、慢跑或骑自行车。</li>",
+            "<li>这是参观博物馆、美术馆或购物中心的好时机。</li>",
+            "<li>多云天气下的摄影也很有质感，试试抓拍云朵变化！</li>"
+        ),
+        'rain': (
+            "<li>雨天最适合室内活动，可以访问博物馆、电影院或咖啡厅。</li>",
+            "<li>如需外出，请携带雨伞或穿着防水外套。</li>",
+            "<li>这是在家享受阅读或看电影的好时机。</li>"
+        ),
+        'snow': (
+            "<li>雪天适合冬季运动，如滑雪、雪橇或堆雪人。</li>",
+            "<li>外出时请穿着保暖衣物，注意路面可能湿滑。</li>",
+            "<li>这是在家享受热饮和温暖活动的好时机。</li>"
+        ),
+        'thunder': (
+            "<li>雷暴天气请尽量避免户外活动，留在室内安全地方。</li>",
+            "<li>确保电子设备已充电，以防停电。</li>",
+            "<li>这是在家享受阅读或娱乐活动的好时机。</li>"
+        ),
+        'fog': (
+            "<li>雾天驾驶请减速并打开车灯，保持安全距离。</li>",
+            "<li>适合近距离活动，避免长途旅行。</li>",
+            "<li>雾天氛围独特，摄影爱好者可以捕捉迷人景色。</li>"
+        ),
+        'default': (
+            "<li>请根据实时天气状况调整您的活动计划。</li>",
+            "<li>出门前检查最新天气预报。</li>",
+            "<li>随时准备适合当天天气的服装和装备。</li>"
+        ),
+    },
+    'en': {
+        'clear': (
+            "<li>Perfect weather for outdoor activities like hiking, picnics, or walks in the park.</li>",
+            "<li>Remember to apply sunscreen and stay hydrated when out in the sun.</li>",
+            "<li>Great day for outdoor photography!</li>"
+        ),
+        'cloud': (
+            "<li>Cloudy weather is good for light outdoor activities like walking, jogging, or cycling.</li>",
+            "<li>Good time to visit museums, art galleries, or shopping centers.</li>",
+            "<li>Cloudy days offer great lighting for photography without harsh shadows.</li>"
+        ),
+        'rain': (
+            "<li>Rainy weather is perfect for indoor activities - visit museums, cinemas, or cafes.</li>",
+            "<li>If you need to go out, carry an umbrella or wear a waterproof jacket.</li>",
+            "<li>Great time for reading or movie watching at home.</li>"
+        ),
+        'snow': (
+            "<li>Snow weather is great for winter sports like skiing, sledding, or building snowmen.</li>",
+            "<li>Wear warm layers when going outside and be cautious of slippery surfaces.</li>",
+            "<li>Perfect time for warm drinks and cozy activities at home.</li>"
+        ),
+        'thunder': (
+            "<li>During thunderstorms, avoid outdoor activities and stay inside a safe building.</li>",
+            "<li>Ensure electronic devices are charged in case of power outages.</li>",
+            "<li>Great time for indoor reading or entertainment.</li>"
+        ),
+        'fog': (
+            "<li>Drive slowly with lights on during foggy conditions and maintain safe distances.</li>",
+            "<li>Better for close-to-home activities, avoid long-distance travel if possible.</li>",
+            "<li>Fog creates unique atmospheres for photographers to capture.</li>"
+        ),
+        'default': (
+            "<li>Adjust your activities according to the current weather conditions.</li>",
+            "<li>Check the latest forecast before heading out.</li>",
+            "<li>Be prepared with appropriate clothing and gear for the day's weather.</li>"
+        ),
+    },
+}
+
+# Temperature, precipitation and filler suggestions, indexed by language
+_ACTIVITY_EXTRAS = {
+    'zh': {
+        'hot': "<li>高温天气请避免剧烈运动，多喝水并寻找阴凉处。</li>",
+        'cold': "<li>低温天气请穿着保暖衣物，特别是保护头部、手部和脚部。</li>",
+        'precip': "<li>有较高降水可能，外出请携带雨具。</li>",
+        'filler': "<li>请根据天气状况做好相应准备。</li>",
+    },
+    'en': {
+        'hot': "<li>Avoid strenuous activities in high temperatures, stay hydrated, and seek shade.</li>",
+        'cold': "<li>Dress warmly in cold temperatures, especially protecting your head, hands, and feet.</li>",
+        'precip': "<li>High chance of precipitation, bring rain gear when going out.</li>",
+        'filler': "<li>Be prepared according to weather conditions.</li>",
+    },
+}
+
+# Weather type keywords mapped to activity suggestion buckets, checked in order
+_BUCKET_KEYWORDS = (
+    ('clear', 'clear'), ('sun', 'clear'),
+    ('cloud', 'cloud'),
+    ('rain', 'rain'),
+    ('snow', 'snow'),
+    ('thunder', 'thunder'), ('storm', 'thunder'),
+    ('fog', 'fog'), ('mist', 'fog')
+)
+
+def _bucket(weather_type):
+    """Classify a lower-cased weather type into an activity suggestion bucket."""
+    return next((bucket for keyword, bucket in _BUCKET_KEYWORDS if keyword in weather_type), 'default')
+
 def generate_activity_suggestions(weather_info, language='en'):
     """
     Generate activity suggestions based on weather information.
@@ -283,126 +416,23 @@ def generate_activity_suggestions(weather_info, language='en'):
     temp_max = float(weather_info.get('temp_max', 0))
     max_precip = float(weather_info.get('max_precip', 0))
     
-    # Initialize suggestion lists
-    suggestions = []
-    
-    # Generate suggestions based on weather type and conditions
-    if language.startswith('zh'):
-        # Chinese suggestions
-        if 'clear' in weather_type or weather_type == 'sun':
-            suggestions.extend([
-                "<li>晴朗的天气非常适合户外活动，如远足、野餐或公园漫步。</li>",
-                "<li>在阳光下活动时，请记得涂抹防晒霜并多喝水。</li>",
-                "<li>今天是拍摄户外照片的绝佳时机！</li>"
-            ])
-        elif 'cloud' in weather_type:
-            suggestions.extend([
-                "<li>多云天气适合轻度户外活动，如散步、慢跑或骑自行车。</li>",
-                "<li>这是参观博物馆、美术馆或购物中心的好时机。</li>",
-                "<li>多云天气下的摄影也很有质感，试试抓拍云朵变化！</li>"
-            ])
-        elif 'rain' in weather_type:
-            suggestions.extend([
-                "<li>雨天最适合室内活动，可以访问博物馆、电影院或咖啡厅。</li>",
-                "<li>如需外出，请携带雨伞或穿着防水外套。</li>",
-                "<li>这是在家享受阅读或看电影的好时机。</li>"
-            ])
-        elif 'snow' in weather_type:
-            suggestions.extend([
-                "<li>雪天适合冬季运动，如滑雪、雪橇或堆雪人。</li>",
-                "<li>外出时请穿着保暖衣物，注意路面可能湿滑。</li>",
-                "<li>这是在家享受热饮和温暖活动的好时机。</li>"
-            ])
-        elif 'thunder' in weather_type or 'storm' in weather_type:
-            suggestions.extend([
-                "<li>雷暴天气请尽量避免户外活动，留在室内安全地方。</li>",
-                "<li>确保电子设备已充电，以防停电。</li>",
-                "<li>这是在家享受阅读或娱乐活动的好时机。</li>"
-            ])
-        elif 'fog' in weather_type or 'mist' in weather_type:
-            suggestions.extend([
-                "<li>雾天驾驶请减速并打开车灯，保持安全距离。</li>",
-                "<li>适合近距离活动，避免长途旅行。</li>",
-                "<li>雾天氛围独特，摄影爱好者可以捕捉迷人景色。</li>"
-            ])
-        else:
-            suggestions.extend([
-                "<li>请根据实时天气状况调整您的活动计划。</li>",
-                "<li>出门前检查最新天气预报。</li>",
-                "<li>随时准备适合当天天气的服装和装备。</li>"
-            ])
-        
-        # Temperature-based suggestions (Chinese)
-        if temp_max > 30:
-            suggestions.append("<li>高温天气请避免剧烈运动，多喝水并寻找阴凉处。</li>")
-        elif temp_min < 5:
-            suggestions.append("<li>低温天气请穿着保暖衣物，特别是保护头部、手部和脚部。</li>")
-        
-        # Precipitation-based suggestions (Chinese)
-        if max_precip > 50:
-            suggestions.append("<li>有较高降水可能，外出请携带雨具。</li>")
-        
-    else:
-        # English suggestions
-        if 'clear' in weather_type or weather_type == 'sun':
-            suggestions.extend([
-                "<li>Perfect weather for outdoor activities like hiking, picnics, or walks in the park.</li>",
-                "<li>Remember to apply sunscreen and stay hydrated when out in the sun.</li>",
-                "<li>Great day for outdoor photography!</li>"
-            ])
-        elif 'cloud' in weather_type:
-            suggestions.extend([
-                "<li>Cloudy weather is good for light outdoor activities like walking, jogging, or cycling.</li>",
-                "<li>Good time to visit museums, art galleries, or shopping centers.</li>",
-                "<li>Cloudy days offer great lighting for photography without harsh shadows.</li>"
-            ])
-        elif 'rain' in weather_type:
-            suggestions.extend([
-                "<li>Rainy weather is perfect for indoor activities - visit museums, cinemas, or cafes.</li>",
-                "<li>If you need to go out, carry an umbrella or wear a waterproof jacket.</li>",
-                "<li>Great time for reading or movie watching at home.</li>"
-            ])
-        elif 'snow' in weather_type:
-            suggestions.extend([
-                "<li>Snow weather is great for winter sports like skiing, sledding, or building snowmen.</li>",
-                "<li>Wear warm layers when going outside and be cautious of slippery surfaces.</li>",
-                "<li>Perfect time for warm drinks and cozy activities at home.</li>"
-            ])
-        elif 'thunder' in weather_type or 'storm' in weather_type:
-            suggestions.extend([
-                "<li>During thunderstorms, avoid outdoor activities and stay inside a safe building.</li>",
-                "<li>Ensure electronic devices are charged in case of power outages.</li>",
-                "<li>Great time for indoor reading or entertainment.</li>"
-            ])
-        elif 'fog' in weather_type or 'mist' in weather_type:
-            suggestions.extend([
-                "<li>Drive slowly with lights on during foggy conditions and maintain safe distances.</li>",
-                "<li>Better for close-to-home activities, avoid long-distance travel if possible.</li>",
-                "<li>Fog creates unique atmospheres for photographers to capture.</li>"
-            ])
-        else:
-            suggestions.extend([
-                "<li>Adjust your activities according to the current weather conditions.</li>",
-                "<li>Check the latest forecast before heading out.</li>",
-                "<li>Be prepared with appropriate clothing and gear for the day's weather.</li>"
-            ])
-        
-        # Temperature-based suggestions (English)
-        if temp_max > 30:
-            suggestions.append("<li>Avoid strenuous activities in high temperatures, stay hydrated, and seek shade.</li>")
-        elif temp_min < 5:
-            suggestions.append("<li>Dress warmly in cold temperatures, especially protecting your head, hands, and feet.</li>")
-        
-        # Precipitation-based suggestions (English)
-        if max_precip > 50:
-            suggestions.append("<li>High chance of precipitation, bring rain gear when going out.</li>")
-    
-    # Randomly select three suggestions if we have more than three
-    import random
-    if len(suggestions) > 3:
-        selected_suggestions = random.sample(suggestions, 3)
-    else:
-        selected_suggestions = suggestions
+    # Chinese suggestions for zh* languages, English otherwise
+    language_key = 'zh' if language.startswith('zh') else 'en'
+    extras = _ACTIVITY_EXTRAS[language_key]
+    
+    # Temperature and precipitation suggestions are always included when they apply
+    conditional_suggestions = []
+    if temp_max > 30:
+        conditional_suggestions.append(extras['hot'])
+    elif temp_min < 5:
+        conditional_suggestions.append(extras['cold'])
+    if max_precip > 50:
+        conditional_suggestions.append(extras['precip'])
+    
+    # Fill the remaining slots with a random sample from the weather type's table
+    base = _ACTIVITY_SUGGESTIONS[language_key][_bucket(weather_type)]
+    sample_size = min(len(base), 3 - len(conditional_suggestions))
+    selected_suggestions = random.sample(base, sample_size) + conditional_suggestions
     
     # Create a dictionary with the activity suggestions
     activity_suggestions = {}
@@ -411,13 +441,22 @@ def generate_activity_suggestions(weather_info, language='en'):
     
     # Fill in any missing suggestions up to 3
     for i in range(len(selected_suggestions) + 1, 4):
-        if language.startswith('zh'):
-            activity_suggestions[f'activity_suggestion_{i}'] = "<li>请根据天气状况做好相应准备。</li>"
-        else:
-            activity_suggestions[f'activity_suggestion_{i}'] = "<li>Be prepared according to weather conditions.</li>"
+        activity_suggestions[f'activity_suggestion_{i}'] = extras['filler']
     
     return activity_suggestions
 
+# Cache of DeepSeek responses: entries expire after the TTL and the oldest are evicted past the size limit
+_ELUDECIA_CACHE_TTL = 3600  # seconds
+_ELUDECIA_CACHE_SIZE = 128
+_ELUDECIA_CACHE_WEATHER_KEYS = (
+    'location', 'weather_type', 'weather_main_type', 'weather_temperature',
+    'temp_min', 'temp_max', 'max_precip', 'weather_humidity', 'weather_wind'
+)
+_eludecia_cache = OrderedDict()
+_eludecia_cache_lock = threading.Lock()
+# Requests currently in flight, so concurrent callers with the same key share one API call
+_eludecia_inflight = {}
+
 def get_eludecia_response(config, weather_info, character_prompt=None, language=None, timezone=None):
     """
     Use DeepSeek API to generate a response from Eludecia about the weather.
@@ -438,10 +477,11 @@ def get_eludecia_response(config, weather_info, character_prompt=None, language=
     weather_type = weather_info.get('weather_type', '').split(':')[0].strip() if weather_info else 'current'
     
     # Use provided parameters or fall back to defaults from config
+    service_preference = config.get('preferences', {}).get('servicePreference', {})
     if language is None:
-        language = config.get('preferences', {}).get('servicePreference', {}).get('language', 'en')
+        language = service_preference.get('language', 'en')
     if timezone is None:
-        timezone = config.get('preferences', {}).get('servicePreference', {}).get('timezone', 'UTC')
+        timezone = service_preference.get('timezone', 'UTC')
     
     # Default character prompt if none provided
     if character_prompt is None:
@@ -450,56 +490,122 @@ def get_eludecia_response(config, weather_info, character_prompt=None, language=
     if not api_key or not base_url:
         return "DeepSeek API configuration missing. Unable to generate Eludecia's response."
     
-    try:
-        # Create OpenAI client with DeepSeek configuration
-        client = OpenAI(api_key=api_key, base_url=base_url)
-        
-        # Create prompt for the API, including language and timezone preferences
-        prompt = f"""
-        {character_prompt}
-        Respond to the following weather information. The response should be in the format of a letter 
-        and should cover all the useful information in the weather information. 
-        Keep your response under 400 words. Also remember to give some suggestions based on the weather condition.
-        
-        Weather Information:{weather_info}
-        Language: {language}
-        Timezone: {timezone}
-        
-        IMPORTANT: Remember to response in the way the character will do, including mouth addiction, ways of talking .etc. Remember not to use markdown format, just use the plain text as response. If the user's language is not English, respond in that language.
-        For example, if language is 'fr', respond in French; if 'de', respond in German; etc.
-        Make sure your response reflects local time considerations based on the timezone.
-        """
-        
-        # Make API request
-        response = client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[
-                {"role": "system", "content": character_prompt},
-                {"role": "user", "content": prompt},
-            ],
-            stream=False
-        )
+    # Recipients with the same character, preferences and weather summary share one response
+    cache_key = (api_key, base_url, character_prompt, language, timezone,
+                 tuple(weather_info.get(key) for key in _ELUDECIA_CACHE_WEATHER_KEYS))
+    now = time.monotonic()
+    with _eludecia_cache_lock:
+        cached = _eludecia_cache.get(cache_key)
+        if cached is not None and now - cached[0] < _ELUDECIA_CACHE_TTL:
+            _eludecia_cache.move_to_end(cache_key)
+            return cached[1]
         
-        # Extract and return the generated text
-        return response.choices[0].message.content
-    except Exception as e:
-        print(f"Failed to get response from DeepSeek API: {e}")
+        # Wait for an identical request already in flight instead of issuing another
+        pending = _eludecia_inflight.get(cache_key)
+        if pending is None:
+            _eludecia_inflight[cache_key] = Future()
+    
+    if pending is not None:
+        response = pending.result()
+    else:
+        response = None
+        try:
+            response = _request_eludecia_response(api_key, base_url, weather_info, character_prompt, language, timezone)
+        except Exception as e:
+            logger.error("Failed to get response from DeepSeek API: %s", e)
+        finally:
+            # Only successful responses are cached; waiters get None on failure
+            with _eludecia_cache_lock:
+                if response is not None:
+                    _eludecia_cache[cache_key] = (now, response)
+                    _eludecia_cache.move_to_end(cache_key)
+                    while len(_eludecia_cache) > _ELUDECIA_CACHE_SIZE:
+                        _eludecia_cache.popitem(last=False)
+                _eludecia_inflight.pop(cache_key).set_result(response)
+    
+    if response is None:
         # Use weather_type extracted at the beginning of the function
         return f"Sorry, I'm unable to provide a personalized weather description for {weather_type.lower()} weather at the moment."
+    return response
+
+_DEEPSEEK_TIMEOUT = 30.0  # seconds
+
+@functools.lru_cache(maxsize=4)
+def _openai_client(api_key, base_url):
+    """Return a shared OpenAI client so its connection pool is reused across calls."""
+    # Bound each request so one slow DeepSeek call cannot stall a whole send
+    return OpenAI(api_key=api_key, base_url=base_url, timeout=_DEEPSEEK_TIMEOUT, max_retries=2)
 
-def construct_email(config, weather_info, suggestion_path, recipient=None):
+def _request_eludecia_response(api_key, base_url, weather_info, character_prompt, language, timezone):
+    """Request a weather letter from the DeepSeek API."""
+    # Reuse the long-lived OpenAI client for this DeepSeek configuration
+    client = _openai_client(api_key, base_url)
+    
+    # Serialize weather information as JSON for a compact, unambiguous prompt
+    weather_json = _dumps(weather_info)
+    
+    # Create prompt for the API, including language and timezone preferences
+    prompt = f"""
+    {character_prompt}
+    Respond to the following weather information. The response should be in the format of a letter 
+    and should cover all the useful information in the weather information. 
+    Keep your response under 400 words. Also remember to give some suggestions based on the weather condition.
+    
+    Weather Information:{weather_json}
+    Language: {language}
+    Timezone: {timezone}
+    
+    IMPORTANT: Remember to response in the way the character will do, including mouth addiction, ways of talking .etc. Remember not to use markdown format, just use the plain text as response. If the user's language is not English, respond in that language.
+    For example, if language is 'fr', respond in French; if 'de', respond in German; etc.
+    Make sure your response reflects local time considerations based on the timezone.
+    """
+    
+    # Make API request
+    response = client.chat.completions.create(
+        model="deepseek-chat",
+        messages=[
+            {"role": "system", "content": character_prompt},
+            {"role": "user", "content": prompt},
+        ],
+        stream=True
+    )
+    
+    # Accumulate the streamed chunks into the generated text
+    parts = []
+    for chunk in response:
+        if chunk.choices and chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+    return ''.join(parts)
+
+@functools.lru_cache(maxsize=8)
+def _load_suggestions(path, mtime):
+    """Load and parse suggestion.json, cached until the file's mtime changes."""
+    return _loads(pathlib.Path(path).read_bytes())
+
+def load_suggestions(suggestion_path):
+    """Return the parsed suggestion.json, re-reading it only when the file has changed."""
+    return _load_suggestions(str(suggestion_path), os.path.getmtime(suggestion_path))
+
+def _timestamp_context(now=None):
+    """Format the send time once so a batch of emails shares the same values."""
+    if now is None:
+        now = datetime.now()
+    return {
+        'current_year': now.year,
+        'update_time': now.strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+def construct_email(config, weather_info, suggestion_dict, recipient=None, context=None):
     """
     Construct the email body with weather information.
     
     Args:
         config: Application configuration
         weather_info: Weather information dictionary
-        suggestion_path: Path to suggestion.json
+        suggestion_dict: Parsed suggestion.json, as returned by load_suggestions
         recipient: Optional recipient information dictionary (email, location, characterPrompt, etc.)
+        context: Optional timestamp context from _timestamp_context, shared across a batch
     """  
-    with open(suggestion_path, 'r', encoding='utf-8') as suggestion_file:
-        suggestion_dict = json.load(suggestion_file)
-    
     # Get weather condition from weather info
     weather_type = weather_info['weather_type'].split(':')[0].strip()
     if weather_type not in suggestion_dict:
@@ -509,8 +615,9 @@ def construct_email(config, weather_info, suggestion_path, recipient=None):
         suggestion = random.choice(suggestion_dict.get(weather_type, ["Have a great day!"]))
     
     # Get language preference (from recipient or global settings)
-    language = config.get('preferences', {}).get('servicePreference', {}).get('language', 'en')
-    timezone = config.get('preferences', {}).get('servicePreference', {}).get('timezone', 'UTC')
+    service_preference = config.get('preferences', {}).get('servicePreference', {})
+    language = service_preference.get('language', 'en')
+    timezone = service_preference.get('timezone', 'UTC')
     character_prompt = None
     
     # If recipient is provided, use their specific settings
@@ -538,16 +645,17 @@ def construct_email(config, weather_info, suggestion_path, recipient=None):
     """
 
     # Obtain sender email address from configuration
-    sender_email = config.get('api', {}).get('email', {}).get('senderEmail')
+    email_config = config.get('api', {}).get('email', {})
+    sender_email = email_config.get('senderEmail')
     if sender_email is None:
         raise ValueError("Sender email not found in configuration.json")
 
-    sender_name = config.get('api', {}).get('email', {}).get('senderName')
+    sender_name = email_config.get('senderName')
     if sender_name is None:
         raise ValueError("Sender name not found in configuration.json")
     
     # Use recipient's email or fall back to config
-    to_emails = [recipient.get('email')] if recipient and 'email' in recipient else config.get('api', {}).get('email', {}).get('toEmails')
+    to_emails = [recipient.get('email')] if recipient and 'email' in recipient else email_config.get('toEmails')
     
     if not to_emails:
         raise ValueError("Recipient email not found")
@@ -555,10 +663,6 @@ def construct_email(config, weather_info, suggestion_path, recipient=None):
     # Create a subject line with weather information
     subject = f"{weather_info['current_time'].split()[0] if 'current_time' in weather_info else ''} | Weather for {weather_info.get('location', '')} | {suggestion}"
     
-    # Create HTML version of the email based on language preference
-    current_date = weather_info.get('current_time', '').split()[0] if 'current_time' in weather_info else datetime.now().strftime('%Y-%m-%d')
-    current_year = datetime.now().year
-    
     # Return the email components
     return {
         'sender_email': sender_email,
@@ -571,17 +675,124 @@ def construct_email(config, weather_info, suggestion_path, recipient=None):
         'suggestion': suggestion,
         'eludecia_response': eludecia_response,
         'character_prompt': character_prompt,
-        'activity_suggestions': activity_suggestions
+        'activity_suggestions': activity_suggestions,
+        'context': context if context is not None else _timestamp_context()
     }
 
-def send_email(config, mail_content):
-    """Send an email using Tencent Cloud Email Service with template."""
-    # Import Tencent Cloud modules
+def build_emails(config, weather_info, suggestion_dict, recipients, executor=None):
+    """
+    Construct emails for several recipients sharing the same weather information.
+    
+    The DeepSeek calls made by construct_email are network-bound, so the emails
+    are built concurrently and returned in the same order as recipients. Entries
+    for recipients whose email could not be built are None.
+    
+    Args:
+        executor: Shared executor to build on; a temporary pool is used if omitted
+    """
+    # Take the timestamp once for the whole batch
+    context = _timestamp_context()
+    
+    def build(recipient):
+        # A failure for one recipient must not prevent the others from being built
+        try:
+            return construct_email(config, weather_info, suggestion_dict, recipient, context)
+        except Exception as e:
+            logger.error("Error constructing email for recipient %s: %s", recipient.get('email', 'unknown'), e)
+            return None
+    
+    if executor is not None:
+        return list(executor.map(build, recipients))
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        return list(executor.map(build, recipients))
+
+# Extracts the character name from prompts such as "You are the succubus paladin Eludecia."
+_CHARACTER_NAME_RE = re.compile(r"You are (?:the |a |an )?([A-Za-z\s]+)", re.IGNORECASE)
+
+# Template variables copied from weather_info, defaulting to an empty string
+_TEMPLATE_WEATHER_KEYS = (
+    'weather_type', 'weather_temperature', 'weather_temperature_range', 'weather_humidity',
+    'weather_pressure', 'weather_wind', 'weather_visibility', 'weather_daylight'
+)
+
+# Template variables copied from weather_info, defaulting to 'Unknown'
+_TEMPLATE_FORECAST_KEYS = (
+    'weather_uvi', 'weather_clouds',
+    # Morning, afternoon and evening forecast slots
+    *(f"{slot}_{field}" for slot in _FORECAST_SLOTS.values() for field in ('weather', 'temp', 'precip')),
+    # Day summary
+    'weather_main_type', 'temp_min', 'temp_max', 'max_precip', 'max_precip_time'
+)
+
+# Fallback values for the template variables copied from weather_info
+_TEMPLATE_DEFAULTS = {**dict.fromkeys(_TEMPLATE_WEATHER_KEYS, ''), **dict.fromkeys(_TEMPLATE_FORECAST_KEYS, 'Unknown')}
+
+# Tencent Cloud SES template used for weather emails
+_TEMPLATE_ID = 31550
+
+def _pack_template_data(weather_info, extras):
+    """
+    Serialize the template variables for _TEMPLATE_ID to a JSON string.
+    
+    The template's variable names are fixed, so the weather fields are copied
+    through the precomputed defaults and only the per-email extras vary.
+    """
+    weather_values = {**_TEMPLATE_DEFAULTS, **weather_info}
+    template_data = {key: weather_values[key] for key in _TEMPLATE_DEFAULTS}
+    template_data.update(extras)
+    
+    # Log the template data for debugging
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Template data being sent:\n%s", _dumps(template_data, indent=True))
+    
+    return _dumps(template_data)
+
+@functools.lru_cache(maxsize=1)
+def _get_tencent():
+    """Import the Tencent Cloud SDK modules on first use and keep them for later sends."""
     from tencentcloud.common import credential
     from tencentcloud.common.profile.client_profile import ClientProfile
     from tencentcloud.common.profile.http_profile import HttpProfile
     from tencentcloud.ses.v20201002 import ses_client, models
-    import json
+    return SimpleNamespace(credential=credential, ClientProfile=ClientProfile, HttpProfile=HttpProfile,
+                           ses_client=ses_client, models=models)
+
+# Tencent Cloud SES clients per thread; the SDK does not document its clients as thread-safe
+_ses_local = threading.local()
+
+def _ses_client(secret_id, secret_key, region):
+    """Return this thread's Tencent Cloud Email Service client, which keeps its connection alive between sends."""
+    clients = getattr(_ses_local, 'clients', None)
+    if clients is None:
+        clients = _ses_local.clients = {}
+    key = (secret_id, secret_key, region)
+    if key not in clients:
+        clients[key] = _create_ses_client(secret_id, secret_key, region)
+    return clients[key]
+
+def _create_ses_client(secret_id, secret_key, region):
+    """Create a Tencent Cloud Email Service client for the given credentials."""
+    tencent = _get_tencent()
+    
+    # Initialize Tencent Cloud credentials
+    cred = tencent.credential.Credential(secret_id, secret_key)
+    
+    # Configure HTTP settings
+    httpProfile = tencent.HttpProfile()
+    httpProfile.endpoint = "ses.tencentcloudapi.com"
+    httpProfile.keepAlive = True
+    httpProfile.reqTimeout = 30
+    
+    # Configure client profile
+    clientProfile = tencent.ClientProfile()
+    clientProfile.httpProfile = httpProfile
+    
+    return tencent.ses_client.SesClient(cred, region, clientProfile)
+
+def send_email(config, mail_content):
+    """Send an email using Tencent Cloud Email Service with template. Returns True if it was sent."""
+    # Load Tencent Cloud modules
+    tencent = _get_tencent()
     
     # Accessing email configuration
     email_config = config.get('api', {}).get('email')
@@ -601,22 +812,11 @@ def send_email(config, mail_content):
     to_emails = mail_content['to_emails']
     
     try:
-        # Initialize Tencent Cloud credentials
-        cred = credential.Credential(secret_id, secret_key)
-        
-        # Configure HTTP settings
-        httpProfile = HttpProfile()
-        httpProfile.endpoint = "ses.tencentcloudapi.com"
-        
-        # Configure client profile
-        clientProfile = ClientProfile()
-        clientProfile.httpProfile = httpProfile
-        
-        # Create Tencent Cloud Email Service client
-        client = ses_client.SesClient(cred, region, clientProfile)
+        # Reuse the Tencent Cloud Email Service client for these credentials
+        client = _ses_client(secret_id, secret_key, region)
         
         # Prepare email request
-        req = models.SendEmailRequest()
+        req = tencent.models.SendEmailRequest()
         
         # Set destination addresses
         req.Destination = to_emails
@@ -630,7 +830,8 @@ def send_email(config, mail_content):
         # Get current weather info and other data
         weather_info = mail_content.get('weather_info', {})
         current_date = weather_info.get('current_time', '').split()[0] if 'current_time' in weather_info else ''
-        current_year = datetime.now().year
+        context = mail_content.get('context') or _timestamp_context()
+        current_year = context['current_year']
         eludecia_response = mail_content.get('eludecia_response', '')
         suggestion = mail_content.get('suggestion', '')
         
@@ -650,8 +851,7 @@ def send_email(config, mail_content):
         character_prompt = mail_content.get('character_prompt', '')
         if character_prompt:
             # Try to extract character name from the prompt
-            import re
-            name_match = re.search(r"You are (?:the |a |an )?([A-Za-z\s]+)", character_prompt, re.IGNORECASE)
+            name_match = _CHARACTER_NAME_RE.search(character_prompt)
             character_name = name_match.group(1).strip() if name_match else "Weather Assistant"
         else:
             character_name = "你的天气助手"  # Default character name
@@ -664,67 +864,15 @@ def send_email(config, mail_content):
         
         # Data source and update time
         data_source = "OpenWeatherMap API"
-        weather_update_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        weather_update_time = context['update_time']
         
-        # Create template data matching EXACTLY the variable names used in the template
-        template_data = {
+        # Template variables that do not come from weather_info
+        extras = {
             # Location and date information
             "weather_location": weather_info.get('location', ''),
             "current_date": current_date,
             "current_year": current_year,
             
-            # Current weather data
-            "weather_type": weather_info.get('weather_type', ''),
-            "weather_temperature": weather_info.get('weather_temperature', ''),
-            "weather_temperature_range": weather_info.get('weather_temperature_range', ''),
-            "weather_humidity": weather_info.get('weather_humidity', ''),
-            "weather_pressure": weather_info.get('weather_pressure', ''),
-            "weather_wind": weather_info.get('weather_wind', ''),
-            "weather_visibility": weather_info.get('weather_visibility', ''),
-            "weather_uvi": weather_info.get('weather_uvi', 'Unknown'),
-            "weather_clouds": weather_info.get('weather_clouds', 'Unknown'),
-            "weather_daylight": weather_info.get('weather_daylight', ''),
-            
-            # Morning forecast (6:00, 8:00, 10:00)
-            "morning_6_weather": weather_info.get('morning_6_weather', 'Unknown'),
-            "morning_6_temp": weather_info.get('morning_6_temp', 'Unknown'),
-            "morning_6_precip": weather_info.get('morning_6_precip', 'Unknown'),
-            "morning_8_weather": weather_info.get('morning_8_weather', 'Unknown'),
-            "morning_8_temp": weather_info.get('morning_8_temp', 'Unknown'),
-            "morning_8_precip": weather_info.get('morning_8_precip', 'Unknown'),
-            "morning_10_weather": weather_info.get('morning_10_weather', 'Unknown'),
-            "morning_10_temp": weather_info.get('morning_10_temp', 'Unknown'),
-            "morning_10_precip": weather_info.get('morning_10_precip', 'Unknown'),
-            
-            # Afternoon forecast (12:00, 14:00, 16:00)
-            "afternoon_12_weather": weather_info.get('afternoon_12_weather', 'Unknown'),
-            "afternoon_12_temp": weather_info.get('afternoon_12_temp', 'Unknown'),
-            "afternoon_12_precip": weather_info.get('afternoon_12_precip', 'Unknown'),
-            "afternoon_14_weather": weather_info.get('afternoon_14_weather', 'Unknown'),
-            "afternoon_14_temp": weather_info.get('afternoon_14_temp', 'Unknown'),
-            "afternoon_14_precip": weather_info.get('afternoon_14_precip', 'Unknown'),
-            "afternoon_16_weather": weather_info.get('afternoon_16_weather', 'Unknown'),
-            "afternoon_16_temp": weather_info.get('afternoon_16_temp', 'Unknown'),
-            "afternoon_16_precip": weather_info.get('afternoon_16_precip', 'Unknown'),
-            
-            # Evening forecast (18:00, 20:00, 22:00)
-            "evening_18_weather": weather_info.get('evening_18_weather', 'Unknown'),
-            "evening_18_temp": weather_info.get('evening_18_temp', 'Unknown'),
-            "evening_18_precip": weather_info.get('evening_18_precip', 'Unknown'),
-            "evening_20_weather": weather_info.get('evening_20_weather', 'Unknown'),
-            "evening_20_temp": weather_info.get('evening_20_temp', 'Unknown'),
-            "evening_20_precip": weather_info.get('evening_20_precip', 'Unknown'),
-            "evening_22_weather": weather_info.get('evening_22_weather', 'Unknown'),
-            "evening_22_temp": weather_info.get('evening_22_temp', 'Unknown'),
-            "evening_22_precip": weather_info.get('evening_22_precip', 'Unknown'),
-            
-            # Day summary
-            "weather_main_type": weather_info.get('weather_main_type', 'Unknown'),
-            "temp_min": weather_info.get('temp_min', 'Unknown'),
-            "temp_max": weather_info.get('temp_max', 'Unknown'),
-            "max_precip": weather_info.get('max_precip', 'Unknown'),
-            "max_precip_time": weather_info.get('max_precip_time', 'Unknown'),
-            
             # Activity suggestions
             "activity_suggestion_1": activity_suggestion_1,
             "activity_suggestion_2": activity_suggestion_2,
@@ -748,90 +896,133 @@ def send_email(config, mail_content):
             "weather_update_time": weather_update_time
         }
         
-        # Print the template data for debugging
-        print("Template data being sent:")
-        print(json.dumps(template_data, indent=2, ensure_ascii=False))
-        
         # Set email template configuration
-        template = {}
-        template["TemplateID"] = 31550  # Using the specified template ID
-        template["TemplateData"] = json.dumps(template_data)  # Convert data to JSON string
-        req.Template = template
+        req.Template = {
+            "TemplateID": _TEMPLATE_ID,
+            "TemplateData": _pack_template_data(weather_info, extras)
+        }
         
         # Send the email using Tencent Cloud API
         resp = client.SendEmail(req)
-        print(f"Email sent successfully using template ID 31550! Message ID: {resp.MessageId}")
+        logger.info("Email sent successfully using template ID %s! Message ID: %s", _TEMPLATE_ID, resp.MessageId)
+        return True
         
     except Exception as e:
-        print(f"Failed to send email: {e}")
-        print("Tip: Make sure your sender email is verified in Tencent Cloud")
-        print("You need to follow Tencent Cloud's sender email verification process at: https://console.cloud.tencent.com/ses/sender")
+        # Emit the error and the tips as one record so concurrent sends cannot interleave them
+        logger.error(
+            "Failed to send email: %s\n"
+            "Tip: Make sure your sender email is verified in Tencent Cloud\n"
+            "You need to follow Tencent Cloud's sender email verification process at: https://console.cloud.tencent.com/ses/sender",
+            e
+        )
+        return False
+
+def _process_location(config, location, recipients, suggestion_dict, build_executor, send_executor):
+    """
+    Fetch weather for one location and send the update to each of its recipients.
+    
+    Emails are built and sent on the executors shared by all locations, which
+    bound the number of concurrent DeepSeek and Tencent Cloud requests.
+    """
+    logger.info("Processing weather data for %d recipient(s) at location %s, %s",
+                len(recipients), location.get('city'), location.get('country'))
+    
+    # Get weather and forecast data for this location in a single request
+    onecall_data = obtain_onecall_data(config, location)
+    complete_weather_info = process_onecall_data(onecall_data, location)
+    
+    # Create emails with recipient-specific information
+    mail_contents = build_emails(config, complete_weather_info, suggestion_dict, recipients, build_executor)
+    
+    # Send the emails concurrently; each send is an independent API round trip
+    futures = {
+        send_executor.submit(send_email, config, mail_content): recipient
+        for recipient, mail_content in zip(recipients, mail_contents)
+        if mail_content is not None
+    }
+    for future in as_completed(futures):
+        recipient = futures[future]
+        try:
+            if future.result():
+                logger.info("Successfully sent weather update to %s", recipient['email'])
+            else:
+                logger.error("Failed to send weather update to %s", recipient['email'])
+        except Exception as e:
+            logger.error("Error sending weather to recipient %s: %s", recipient.get('email', 'unknown'), e)
 
 def process_and_send_weather(config):
     """Main function to process weather data and send email."""
     # Check if there are specific recipients configured
     recipients = config.get('recipients', [])
     
+    # Parse the suggestions once for every email in this run
+    suggestion_dict = load_suggestions(base_dir / 'suggestion.json')
+    
     if not recipients:
         # No recipients configured, use the default location
         print("No specific recipients configured. Using default location.")
-        weather_data = obtain_weather_data(config)
-        weather_info = handle_weather_data(weather_data)
-        
-        # Fetch forecast data
-        forecast_data = obtain_forecast_data(config)
-        forecast_info = process_forecast_data(forecast_data)
-        
-        # Combine weather and forecast data
-        complete_weather_info = {**weather_info, **forecast_info}
+        location = config.get('preferences', {}).get('defaultLocation', {})
+        onecall_data = obtain_onecall_data(config, location)
+        complete_weather_info = process_onecall_data(onecall_data, location)
         
-        mail_content = construct_email(config, complete_weather_info, base_dir / 'suggestion.json')
+        mail_content = construct_email(config, complete_weather_info, suggestion_dict)
         send_email(config, mail_content)
     else:
-        # Process weather data for each recipient with their specific location
+        # Group recipients by location so each location is only fetched once
         print(f"Sending weather updates to {len(recipients)} recipients with their specific locations...")
+        recipients_by_location = {}
         for recipient in recipients:
-            try:
-                recipient_email = recipient.get('email')
-                location = recipient.get('location')
-                
-                if not recipient_email or not location:
-                    print(f"Skipping recipient with incomplete information: {recipient}")
-                    continue
-                
-                print(f"Processing weather data for {recipient_email} at location {location.get('city')}, {location.get('country')}")
-                
-                # Get weather data for this recipient's location
-                weather_data = obtain_weather_data(config, location)
-                weather_info = handle_weather_data(weather_data)
-                
-                # Fetch forecast data for this recipient's location
-                forecast_data = obtain_forecast_data(config, location)
-                forecast_info = process_forecast_data(forecast_data)
-                
-                # Combine weather and forecast data
-                complete_weather_info = {**weather_info, **forecast_info}
-                
-                # Create email with recipient-specific information
-                mail_content = construct_email(config, complete_weather_info, base_dir / 'suggestion.json', recipient)
-                
-                # Send the email
-                send_email(config, mail_content)
-                print(f"Successfully sent weather update to {recipient_email}")
-                
-            except Exception as e:
-                print(f"Error processing weather for recipient {recipient.get('email', 'unknown')}: {e}")
+            recipient_email = recipient.get('email')
+            location = recipient.get('location')
+            
+            if not recipient_email or not location:
+                print(f"Skipping recipient with incomplete information: {recipient}")
                 continue
+            
+            location_key = (location.get('city'), location.get('country'))
+            recipients_by_location.setdefault(location_key, []).append(recipient)
+        
+        if not recipients_by_location:
+            return
+        
+        # Process each location concurrently; the work is dominated by network round trips.
+        # Email building and sending share one bounded pool each across all locations.
+        with ThreadPoolExecutor(max_workers=8) as build_executor, \
+                ThreadPoolExecutor(max_workers=8) as send_executor, \
+                ThreadPoolExecutor(max_workers=min(32, len(recipients_by_location))) as executor:
+            futures = {
+                executor.submit(_process_location, config, location_recipients[0]['location'],
+                                location_recipients, suggestion_dict, build_executor, send_executor): location_key
+                for location_key, location_recipients in recipients_by_location.items()
+            }
+            for future in as_completed(futures):
+                city, country = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error("Error processing weather for location %s, %s: %s", city, country, e)
 
+@functools.lru_cache(maxsize=1)
+def _country_name_index():
+    """Build a lower-cased country name to ISO 3166-1 alpha-2 code index."""
+    index = {}
+    for country in pycountry.countries:
+        for attr in ('name', 'official_name', 'common_name'):
+            name = getattr(country, attr, None)
+            if name:
+                index.setdefault(name.lower(), country.alpha_2)
+    return index
+
+@functools.lru_cache(maxsize=512)
 def get_country_iso_code(country_name):
     """
     Convert a country name to its ISO 3166-1 alpha-2 code.
     Returns the country name unchanged if no match is found.
     """
-    # Try to get the country object by name
-    country = pycountry.countries.get(name=country_name)
-    if country:
-        return country.alpha_2
+    # Try an exact (case-insensitive) name match first
+    alpha_2 = _country_name_index().get(country_name.strip().lower())
+    if alpha_2:
+        return alpha_2
         
     # Try with fuzzy matching if exact match fails
     countries = pycountry.countries.search_fuzzy(country_name)
@@ -841,35 +1032,72 @@ def get_country_iso_code(country_name):
     # Return the original if no match found
     return country_name
 
+# Canonical timezone names keyed by lower-cased name, matching pytz's case-insensitive lookup
+_TIMEZONES_BY_LOWER = {tz.lower(): tz for tz in pytz.all_timezones}
+
+# Main menu text, written in a single call
+_MENU = "\n".join([
+    "",
+    "--------------------------------------------------",
+    "Available Commands:",
+    "--------------------------------------------------",
+    "1. Get Weather Update",
+    "2. Update Default Location",
+    "3. Update Email Sender Settings",
+    "4. Update Weather API Key",
+    "5. Update Tencent Cloud API Credentials",
+    "6. Update Default Language and Timezone",
+    "7. Manage Recipients",
+    "8. Update DeepSeek API Key",
+    "9. Exit",
+    "--------------------------------------------------",
+]) + "\n"
+
+# Common timezones shown as examples when asking for a timezone
+_COMMON_TIMEZONES = "\n".join(f"- {tz}" for tz in (
+    "America/New_York", "Europe/London", "Asia/Tokyo",
+    "Australia/Sydney", "Europe/Berlin", "Asia/Shanghai",
+    "America/Los_Angeles", "Asia/Dubai",
+)) + "\n"
+
+# Recipient management menu header and options
+_RECIPIENT_MENU_HEADER = "\n".join([
+    "",
+    "--------------------------------------------------",
+    "Recipient Management",
+    "--------------------------------------------------",
+]) + "\n"
+_RECIPIENT_MENU_OPTIONS = "\n".join([
+    "",
+    "Options:",
+    "1. Add new recipient",
+    "2. Edit existing recipient",
+    "3. Remove recipient",
+    "4. Return to main menu",
+]) + "\n"
+
 def print_options():
     """Print available options for the user."""
-    print("")
-    print("--------------------------------------------------")
-    print("Available Commands:")
-    print("--------------------------------------------------")
-    print("1. Get Weather Update")
-    print("2. Update Default Location")
-    print("3. Update Email Sender Settings")
-    print("4. Update Weather API Key")
-    print("5. Update Tencent Cloud API Credentials")
-    print("6. Update Default Language and Timezone")
-    print("7. Manage Recipients")
-    print("8. Update DeepSeek API Key")
-    print("9. Exit")
-    print("--------------------------------------------------")
+    sys.stdout.write(_MENU)
     userin=input("Enter your command[1-9]: ")
 
     return userin
 
 def manage_recipients(config):
     """Manage recipient-specific settings for personalized weather updates."""
+    # Recipient changes are saved in a single write when the menu is left normally;
+    # an interrupted edit (e.g. Ctrl-C) must not save a half-applied recipient
+    snapshot = _dumps(config)
+    _recipient_menu(config)
+    if _dumps(config) != snapshot:
+        update_config_file(config_path, config)
+
+def _recipient_menu(config):
+    """Interactive menu for adding, editing and removing recipients."""
     recipients = config.get('recipients', [])
     
     while True:
-        print("\n--------------------------------------------------")
-        print("Recipient Management")
-        print("--------------------------------------------------")
-        print(f"Currently configured recipients: {len(recipients)}")
+        lines = [_RECIPIENT_MENU_HEADER, f"Currently configured recipients: {len(recipients)}\n"]
         
         # List current recipients
         for i, recipient in enumerate(recipients):
@@ -877,13 +1105,10 @@ def manage_recipients(config):
             location = recipient.get('location', {})
             city = location.get('city', 'Unknown')
             country = location.get('country', 'Unknown')
-            print(f"{i+1}. {email} - Location: {city}, {country}")
+            lines.append(f"{i+1}. {email} - Location: {city}, {country}\n")
         
-        print("\nOptions:")
-        print("1. Add new recipient")
-        print("2. Edit existing recipient")
-        print("3. Remove recipient")
-        print("4. Return to main menu")
+        lines.append(_RECIPIENT_MENU_OPTIONS)
+        sys.stdout.write(''.join(lines))
         
         choice = input("Enter your choice [1-4]: ")
         
@@ -904,18 +1129,14 @@ def manage_recipients(config):
             
             # Show available timezones for reference
             print("\nSome common timezones:")
-            common_timezones = ["America/New_York", "Europe/London", "Asia/Tokyo", 
-                             "Australia/Sydney", "Europe/Berlin", "Asia/Shanghai", 
-                             "America/Los_Angeles", "Asia/Dubai"]
-            for tz in common_timezones:
-                print(f"- {tz}")
+            sys.stdout.write(_COMMON_TIMEZONES)
                 
             timezone = input("\nEnter timezone: ")
             
             # Try to validate timezone
-            try:
-                pytz.timezone(timezone)
-            except pytz.exceptions.UnknownTimeZoneError:
+            if timezone.lower() in _TIMEZONES_BY_LOWER:
+                timezone = _TIMEZONES_BY_LOWER[timezone.lower()]
+            else:
                 print(f"Warning: '{timezone}' is not a recognized timezone. Using UTC instead.")
                 timezone = "UTC"
             
@@ -943,7 +1164,6 @@ def manage_recipients(config):
             # Add to recipients list
             recipients.append(new_recipient)
             config['recipients'] = recipients
-            update_config_file(config_path, config)
             print(f"\nRecipient {email} added successfully!")
             
         elif choice == '2':
@@ -986,10 +1206,9 @@ def manage_recipients(config):
                     
                 new_timezone = input(f"Timezone ({recipient.get('timezone', 'UTC')}): ")
                 if new_timezone:
-                    try:
-                        pytz.timezone(new_timezone)
-                        recipient['timezone'] = new_timezone
-                    except pytz.exceptions.UnknownTimeZoneError:
+                    if new_timezone.lower() in _TIMEZONES_BY_LOWER:
+                        recipient['timezone'] = _TIMEZONES_BY_LOWER[new_timezone.lower()]
+                    else:
                         print(f"Warning: '{new_timezone}' is not a recognized timezone. Keeping previous value.")
                 
                 # Edit character prompt
@@ -1004,7 +1223,6 @@ def manage_recipients(config):
                 # Update config
                 recipients[index] = recipient
                 config['recipients'] = recipients
-                update_config_file(config_path, config)
                 print(f"\nRecipient {recipient.get('email')} updated successfully!")
                 
             except ValueError:
@@ -1029,7 +1247,6 @@ def manage_recipients(config):
                 if confirm.lower() == 'y':
                     removed = recipients.pop(index)
                     config['recipients'] = recipients
-                    update_config_file(config_path, config)
                     print(f"\nRecipient {removed.get('email')} removed successfully!")
             except ValueError:
                 print("Please enter a valid number.")
@@ -1041,9 +1258,101 @@ def manage_recipients(config):
         else:
             print("Invalid choice. Please try again.")
 
+def _update_location(config):
+    """Update the default location."""
+    print("\nUpdate Default Location")
+    city = input("Enter your default city: ")
+    country_name = input("Enter your default country name: ")
+    country = get_country_iso_code(country_name)
+
+    # Ensure defaultLocation exists
+    if 'defaultLocation' not in config['preferences']:
+        config['preferences']['defaultLocation'] = {}
+
+    config['preferences']['defaultLocation']['city'] = city
+    config['preferences']['defaultLocation']['country'] = country
+
+    update_config_file(config_path, config)
+
+def _update_sender(config):
+    """Update the email sender settings."""
+    print("\nUpdate Email Sender Settings")
+    sender_email = input("Enter your sender email address (must be verified in Tencent Cloud): ")
+    sender_name = input("Enter the name of the assistant: ")
+
+    config['api']['email']['senderEmail'] = sender_email
+    config['api']['email']['senderName'] = sender_name
+
+    update_config_file(config_path, config)
+
+def _update_weather_key(config):
+    """Update the OpenWeatherMap API key."""
+    print("\nUpdate Weather API Key")
+    weather_api_key = input("Enter your OpenWeatherMap API key: ")
+    config['api']['weather']['apiKey'] = weather_api_key
+
+    update_config_file(config_path, config)
+
+def _update_tencent_credentials(config):
+    """Update the Tencent Cloud API credentials."""
+    print("\nUpdate Tencent Cloud API Credentials")
+    secret_id = input("Enter your Tencent Cloud API SecretId: ")
+    secret_key = input("Enter your Tencent Cloud API SecretKey: ")
+    region = input("Enter your preferred Tencent Cloud region (default: ap-guangzhou): ") or "ap-guangzhou"
+
+    config['api']['email']['secretId'] = secret_id
+    config['api']['email']['secretKey'] = secret_key
+    config['api']['email']['region'] = region
+
+    update_config_file(config_path, config)
+
+def _update_preferences(config):
+    """Update the default language and timezone."""
+    print("\nUpdate Default Language and Timezone")
+    language = input("Enter your preferred language (e.g., en, fr, de): ")
+
+    # Show available timezones for reference
+    print("\nSome common timezones:")
+    sys.stdout.write(_COMMON_TIMEZONES)
+
+    timezone = input("\nEnter your timezone: ")
+
+    # Validate the timezone
+    if timezone.lower() in _TIMEZONES_BY_LOWER:
+        config['preferences']['servicePreference']['language'] = language
+        config['preferences']['servicePreference']['timezone'] = _TIMEZONES_BY_LOWER[timezone.lower()]
+        update_config_file(config_path, config)
+    else:
+        print(f"Error: '{timezone}' is not a valid timezone. Please try again.")
+
+def _update_deepseek(config):
+    """Update the DeepSeek API key and endpoint."""
+    print("\nUpdate DeepSeek API Key")
+    deepseek_api_key = input("Enter your DeepSeek API key: ")
+    deepseek_endpoint = input("Enter your DeepSeek API endpoint: ")
+
+    if 'deepseek' not in config['api']:
+        config['api']['deepseek'] = {}
+
+    config['api']['deepseek']['apiKey'] = deepseek_api_key
+    config['api']['deepseek']['endpoint'] = deepseek_endpoint
+
+    update_config_file(config_path, config)
+
+# Handlers for the main menu commands; '9' exits the loop
+_HANDLERS = {
+    '1': process_and_send_weather,
+    '2': _update_location,
+    '3': _update_sender,
+    '4': _update_weather_key,
+    '5': _update_tencent_credentials,
+    '6': _update_preferences,
+    '7': manage_recipients,
+    '8': _update_deepseek,
+}
+
 def main_menu(config):
     """Main menu for user interaction."""
-    commandlist = ['1','2','3','4','5','6','7','8','9']
     print("Welcome to your weather assistant!")
 
     if config.get('preferences', {}).get('firstUse', True):
@@ -1140,100 +1449,40 @@ def main_menu(config):
     
     command = print_options()
     while command != '9':
-        if command not in commandlist:
+        handler = _HANDLERS.get(command)
+        if handler is None:
             print("Invalid command. Please try again.")
-        elif command == '1':
-            process_and_send_weather(config)
-        elif command == '2':
-            print("\nUpdate Default Location")
-            city = input("Enter your default city: ")
-            country_name = input("Enter your default country name: ")
-            country = get_country_iso_code(country_name)
-            
-            # Ensure defaultLocation exists
-            if 'defaultLocation' not in config['preferences']:
-                config['preferences']['defaultLocation'] = {}
-                
-            config['preferences']['defaultLocation']['city'] = city
-            config['preferences']['defaultLocation']['country'] = country
-            
-            update_config_file(config_path, config)
-        elif command == '3':
-            print("\nUpdate Email Sender Settings")
-            sender_email = input("Enter your sender email address (must be verified in Tencent Cloud): ")
-            sender_name = input("Enter the name of the assistant: ")
-            
-            config['api']['email']['senderEmail'] = sender_email
-            config['api']['email']['senderName'] = sender_name
-            
-            update_config_file(config_path, config)
-        elif command == '4':
-            print("\nUpdate Weather API Key")
-            weather_api_key = input("Enter your OpenWeatherMap API key: ")
-            config['api']['weather']['apiKey'] = weather_api_key
-            
-            update_config_file(config_path, config)
-        elif command == '5':
-            print("\nUpdate Tencent Cloud API Credentials")
-            secret_id = input("Enter your Tencent Cloud API SecretId: ")
-            secret_key = input("Enter your Tencent Cloud API SecretKey: ")
-            region = input("Enter your preferred Tencent Cloud region (default: ap-guangzhou): ") or "ap-guangzhou"
-            
-            config['api']['email']['secretId'] = secret_id
-            config['api']['email']['secretKey'] = secret_key
-            config['api']['email']['region'] = region
-            
-            update_config_file(config_path, config)
-        elif command == '6':
-            print("\nUpdate Default Language and Timezone")
-            language = input("Enter your preferred language (e.g., en, fr, de): ")
-            
-            # Show available timezones for reference
-            print("\nSome common timezones:")
-            common_timezones = ["America/New_York", "Europe/London", "Asia/Tokyo", 
-                              "Australia/Sydney", "Europe/Berlin", "Asia/Shanghai", 
-                              "America/Los_Angeles", "Asia/Dubai"]
-            for tz in common_timezones:
-                print(f"- {tz}")
-                
-            timezone = input("\nEnter your timezone: ")
-            
-            # Validate the timezone
-            try:
-                pytz.timezone(timezone)
-                config['preferences']['servicePreference']['language'] = language
-                config['preferences']['servicePreference']['timezone'] = timezone
-                update_config_file(config_path, config)
-            except pytz.exceptions.UnknownTimeZoneError:
-                print(f"Error: '{timezone}' is not a valid timezone. Please try again.")
-        elif command == '7':
-            manage_recipients(config)
-        elif command == '8':
-            print("\nUpdate DeepSeek API Key")
-            deepseek_api_key = input("Enter your DeepSeek API key: ")
-            deepseek_endpoint = input("Enter your DeepSeek API endpoint: ")
-            
-            if 'deepseek' not in config['api']:
-                config['api']['deepseek'] = {}
-            
-            config['api']['deepseek']['apiKey'] = deepseek_api_key
-            config['api']['deepseek']['endpoint'] = deepseek_endpoint
-            
-            update_config_file(config_path, config)
+        else:
+            handler(config)
         command = print_options()
 
 def update_config_file(config_path, config):
     """Manipulate the configuration file."""
-    with open(config_path, 'w') as config_file:
-        json.dump(config, config_file, indent=4)
+    # Write to a temporary file first so an interrupted write never truncates the configuration
+    temp_path = f"{config_path}.tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as config_file:
+            config_file.write(_dumps(config, indent=True))
+        os.replace(temp_path, config_path)
+    except BaseException:
+        # Do not leave a partial temporary file behind
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
     print("Configuration file updated successfully.")
 
 if __name__ == "__main__":
+    # Log to stdout so records land in the scheduler log
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
+    
+    # LOG_LEVEL applies to this module only; library debug output (e.g. urllib3 request URLs) carries API keys
+    log_level = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    logger.setLevel(log_level if isinstance(logging.getLevelName(log_level), int) else logging.INFO)
+    
     # Set the directory path for later file manipulation
     base_dir = pathlib.Path(__file__).resolve().parent
     config_path = base_dir / 'configuration.json'
-    with open(config_path, 'r',encoding='utf-8') as config_file:
-        config = json.load(config_file)
+    config = _loads(config_path.read_bytes())
 
     main_menu(config)
 
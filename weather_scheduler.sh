@@ -29,12 +29,9 @@ cd "$SERVICE_DIR" || {
     exit 1
 }
 
-# Run the weather service with automatic input for option 1 (Get Weather Update)
-# Capture both standard output and error
-{
-    echo "1" | python3 main.py 
-    echo "8" | python3 main.py  # Exit after running
-} >> "$LOG_FILE" 2>> "$ERROR_LOG"
+# Run the weather service once with automatic input for option 1 (Get Weather Update)
+# followed by option 9 (Exit), capturing both standard output and error
+printf '1\n9\n' | python3 main.py >> "$LOG_FILE" 2>> "$ERROR_LOG"
 
 # Check if there were any errors
 if [ -s "$ERROR_LOG" ]; then